@@ -0,0 +1,250 @@
+"""Streamlit app: driven pendulum trajectories.
+
+Integrates a batch of driven-pendulum trajectories
+
+    x'' = -sin(x) + epsilon * sin(t)
+
+from a grid of initial conditions and shows the angle time series next
+to the phase portrait.
+
+Run with: streamlit run pendulum.py
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+import streamlit as st
+from matplotlib.collections import LineCollection
+from scipy.integrate import solve_ivp
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; the NumPy leapfrog still works
+    HAVE_NUMBA = False
+
+st.set_page_config(page_title="Driven Pendulum", layout="wide")
+st.title("Driven Pendulum")
+
+num_trajectories = st.sidebar.slider("Trajectories", 1, 100, 25)
+epsilon = st.sidebar.slider("Drive amplitude (epsilon)", 0.0, 2.0, 0.5)
+max_time = st.sidebar.slider("Max time", 10.0, 100.0, 50.0)
+method = st.sidebar.selectbox(
+    "Integrator", ["Leapfrog", "LSODA", "RK45 (high accuracy)"])
+linewidth = st.sidebar.slider("Line width", 0.1, 3.0, 0.8)
+alpha = st.sidebar.slider("Alpha", 0.1, 1.0, 0.7)
+
+
+def generate_initial_conditions(num_trajectories):
+    """Lay initial conditions out on a (position, velocity) grid.
+
+    Built as one meshgrid call returning an (N, 2) array, which feeds
+    the batched solvers directly.
+    """
+    side = int(np.ceil(np.sqrt(num_trajectories)))
+    xs, vs = np.meshgrid(np.linspace(-np.pi, np.pi, side),
+                         np.linspace(-2.0, 2.0, side))
+    return np.column_stack([xs.ravel(), vs.ravel()])[:num_trajectories]
+
+
+def driven_pendulum(t, y, epsilon):
+    """Right-hand side for a single trajectory.
+
+    This runs once per stage per step in the threaded RK45 path, so
+    math.sin on the scalar state skips the roughly 10x overhead of a
+    0-d ufunc call.
+    """
+    return [y[1], -math.sin(y[0]) + epsilon * math.sin(t)]
+
+
+def rhs_batched(t, y, epsilon, num):
+    """Right-hand side for the stacked state vector of all trajectories.
+
+    y holds the num positions followed by the num velocities, so the
+    sin over all positions is one vectorized call per integrator stage.
+    """
+    x = y[:num]
+    v = y[num:]
+    dv = -np.sin(x) + epsilon * np.sin(t)
+    return np.concatenate([v, dv])
+
+
+if HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _leapfrog_kernel(x0s, v0s, drive, dt, steps, out):
+        """Leapfrog all trajectories in parallel into the (N, steps+1, 2)
+        buffer; each trajectory is an independent scalar loop, so prange
+        splits them across cores with no temporaries. The drive term is
+        a table lookup, not a transcendental."""
+        for i in prange(x0s.size):
+            x = x0s[i]
+            v = v0s[i]
+            out[i, 0, 0] = x
+            out[i, 0, 1] = v
+            for k in range(steps):
+                v += 0.5 * dt * (-math.sin(x) + drive[k])
+                x += dt * v
+                v += 0.5 * dt * (-math.sin(x) + drive[k + 1])
+                out[i, k + 1, 0] = x
+                out[i, k + 1, 1] = v
+
+
+def solve_leapfrog(x0s, v0s, epsilon, max_time, steps_per_unit=50):
+    """Fixed-step leapfrog over the whole batch of trajectories.
+
+    The pendulum is a separable Hamiltonian plus a small drive, so a
+    symplectic fixed-step scheme keeps the phase portrait honest with
+    two sin evaluations per step -- far fewer RHS calls than an adaptive
+    stepper at tight tolerance.
+    """
+    steps = int(max_time * steps_per_unit)
+    dt = max_time / steps
+    t_eval = np.linspace(0.0, max_time, steps + 1)
+    # The drive only depends on the step grid, so evaluate
+    # epsilon*sin(t) once for all steps and all trajectories; the inner
+    # loop then does a single sin per half-kick instead of two.
+    drive = epsilon * np.sin(t_eval)
+    if HAVE_NUMBA:
+        out = np.empty((x0s.size, steps + 1, 2))
+        _leapfrog_kernel(np.ascontiguousarray(x0s, dtype=np.float64),
+                         np.ascontiguousarray(v0s, dtype=np.float64),
+                         drive, dt, steps, out)
+        return t_eval, out[:, :, 0], out[:, :, 1]
+    x = x0s.astype(np.float64).copy()
+    v = v0s.astype(np.float64).copy()
+    xs = np.empty((steps + 1, x.size))
+    vs = np.empty((steps + 1, x.size))
+    xs[0] = x
+    vs[0] = v
+    for k in range(steps):
+        v += 0.5 * dt * (drive[k] - np.sin(x))
+        x += dt * v
+        v += 0.5 * dt * (drive[k + 1] - np.sin(x))
+        xs[k + 1] = x
+        vs[k + 1] = v
+    return t_eval, xs.T, vs.T
+
+
+@st.cache_resource
+def solve_trajectories(num_trajectories, epsilon, max_time,
+                       method="Leapfrog", draft=False):
+    """Integrate all trajectories as one stacked batch.
+
+    Concatenating the state vectors means the stepper (and, for the
+    solve_ivp paths, its Python callback) runs once for the whole batch
+    instead of once per initial condition. The default fixed-step
+    leapfrog is plenty for visualization; LSODA at rtol=1e-5 and RK45 at
+    rtol=1e-8 remain available when accuracy matters more than latency.
+    With draft=True (used while the user is dragging a slider) the
+    tolerances and output density are relaxed for a quick first render.
+    """
+    initial_conditions = generate_initial_conditions(num_trajectories)
+    num = len(initial_conditions)
+    x0s = initial_conditions[:, 0]
+    v0s = initial_conditions[:, 1]
+    points_per_unit = 10 if draft else 50
+    if method == "Leapfrog":
+        t_eval, xs, vs = solve_leapfrog(x0s, v0s, epsilon, max_time,
+                                        steps_per_unit=points_per_unit)
+    elif method == "LSODA":
+        t_eval = np.linspace(0.0, max_time, int(max_time * points_per_unit))
+        y0 = np.concatenate([x0s, v0s])
+        sol = solve_ivp(rhs_batched, (0.0, max_time), y0, t_eval=t_eval,
+                        args=(epsilon, num), method="LSODA",
+                        rtol=1e-4 if draft else 1e-5)
+        xs = sol.y[:num]
+        vs = sol.y[num:]
+    else:
+        # At rtol=1e-8 the batched solve couples the step size: one
+        # near-separatrix trajectory forces tiny steps on the whole
+        # batch. Solve per trajectory instead and spread the solves
+        # over a thread pool -- scipy's integrators release the GIL, so
+        # this scales with cores.
+        t_eval = np.linspace(0.0, max_time, int(max_time * points_per_unit))
+
+        def _solve_one(y0):
+            return solve_ivp(driven_pendulum, (0.0, max_time), y0,
+                             t_eval=t_eval, args=(epsilon,),
+                             method="RK45",
+                             rtol=1e-4 if draft else 1e-8)
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(_solve_one, initial_conditions))
+        xs = np.stack([sol.y[0] for sol in results])
+        vs = np.stack([sol.y[1] for sol in results])
+    # cache_resource hands out the same arrays to every caller; freeze
+    # them so a stray in-place edit cannot corrupt the cache.
+    for arr in (t_eval, xs, vs):
+        arr.flags.writeable = False
+    trajectories = []
+    for i in range(num):
+        trajectories.append({
+            "t": t_eval,
+            "x": xs[i],
+            "v": vs[i],
+            "initial": (x0s[i], v0s[i]),
+        })
+    return trajectories
+
+
+# Progressive refinement: while the user is actively dragging a slider
+# (a parameter changed within the last half second), integrate at draft
+# quality for a snappy redraw, then rerun once the input settles to
+# upgrade the plot in place.
+params = (num_trajectories, epsilon, max_time, method)
+now = time.time()
+if st.session_state.get("last_params") != params:
+    st.session_state["last_params"] = params
+    st.session_state["last_change_ts"] = now
+interacting = now - st.session_state.get("last_change_ts", now) < 0.5
+
+trajectories = solve_trajectories(num_trajectories, epsilon, max_time,
+                                  method, draft=interacting)
+
+@st.cache_resource
+def _get_figure():
+    """One persistent figure per worker; reruns only swap the artists."""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    ax1.set_xlabel("t")
+    ax1.set_ylabel("x")
+    ax1.set_title("Angle vs time")
+    ax2.set_xlabel("x")
+    ax2.set_ylabel("v")
+    ax2.set_title("Phase portrait")
+    fig.tight_layout()
+    return fig, ax1, ax2
+
+
+fig, ax1, ax2 = _get_figure()
+for axis in (ax1, ax2):
+    for artist in list(axis.lines) + list(axis.collections):
+        artist.remove()
+    axis.relim()  # drop the stale data limits before re-adding artists
+
+colors = plt.cm.viridis(np.linspace(0.0, 1.0, len(trajectories)))
+for traj, color in zip(trajectories, colors):
+    ax1.plot(traj["t"], traj["x"], color=color,
+             linewidth=linewidth, alpha=alpha)
+# One LineCollection for all phase curves and ONE scatter for all the
+# initial conditions, instead of N plot and N scatter calls each
+# creating its own artist.
+phase_segs = [np.stack([traj["x"], traj["v"]], axis=-1)
+              for traj in trajectories]
+ax2.add_collection(LineCollection(
+    phase_segs, colors=colors, linewidths=linewidth, alpha=alpha))
+ax2.scatter(np.array([traj["initial"][0] for traj in trajectories]),
+            np.array([traj["initial"][1] for traj in trajectories]),
+            c=colors, s=2, alpha=0.8, zorder=5)
+for axis in (ax1, ax2):
+    axis.autoscale_view()
+st.pyplot(fig, clear_figure=False)
+
+if interacting:
+    # Debounce, then rerun to replace the draft with the full-quality
+    # solve once the sliders have settled.
+    time.sleep(0.5)
+    st.rerun()
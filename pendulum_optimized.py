@@ -0,0 +1,501 @@
+"""Streamlit app: driven pendulum, tuned exploration build.
+
+A second take on the pendulum visualizer with quality presets, manual
+parameter-hash caching and a capped number of displayed trajectories,
+meant for sweeping many more initial conditions than pendulum.py:
+
+    x'' = -sin(x) + epsilon * cos(t)
+
+Run with: streamlit run pendulum_optimized.py
+"""
+
+import functools
+import math
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import streamlit as st
+from matplotlib.collections import LineCollection
+from scipy.integrate import solve_ivp
+from scipy.interpolate import CubicSpline
+from scipy.sparse import diags
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; the NumPy RHS still works
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @functools.lru_cache(maxsize=32)
+    def _make_rhs(eps):
+        """Compile a batched RHS with epsilon baked in as a constant.
+
+        Literal capture lets LLVM fold the drive multiply into the
+        generated code instead of loading a runtime parameter.
+        Compilation costs ~1s, so the LRU keeps one compiled closure
+        per distinct rounded epsilon seen this process.
+        """
+        eps = float(eps)
+
+        @njit(fastmath=True)
+        def rhs(t, y):
+            half = y.shape[0] // 2
+            out = np.empty_like(y)
+            drive = eps * math.cos(t)
+            for i in range(half):
+                out[i] = y[half + i]
+                out[half + i] = -math.sin(y[i]) + drive
+            return out
+
+        return rhs
+
+    @njit(cache=True, fastmath=True)
+    def _rk45_trajectory(x, v, t_eval, eps, rtol, out):
+        """Scalar Dormand-Prince 5(4) for one trajectory.
+
+        No Python-side step-acceptance logic, no array temporaries;
+        steps are clipped to land exactly on the t_eval grid.
+        """
+        atol = 1e-9
+        t = t_eval[0]
+        out[0, 0] = x
+        out[0, 1] = v
+        h = (t_eval[1] - t_eval[0]) / 4.0
+        for m in range(1, t_eval.size):
+            t_target = t_eval[m]
+            while t < t_target:
+                if h > t_target - t:
+                    h = t_target - t
+                k1x = v
+                k1v = -math.sin(x) + eps * math.cos(t)
+                ax = x + h * (k1x / 5.0)
+                av = v + h * (k1v / 5.0)
+                k2x = av
+                k2v = -math.sin(ax) + eps * math.cos(t + h / 5.0)
+                ax = x + h * (3.0 * k1x / 40.0 + 9.0 * k2x / 40.0)
+                av = v + h * (3.0 * k1v / 40.0 + 9.0 * k2v / 40.0)
+                k3x = av
+                k3v = -math.sin(ax) + eps * math.cos(t + 3.0 * h / 10.0)
+                ax = x + h * (44.0 * k1x / 45.0 - 56.0 * k2x / 15.0
+                              + 32.0 * k3x / 9.0)
+                av = v + h * (44.0 * k1v / 45.0 - 56.0 * k2v / 15.0
+                              + 32.0 * k3v / 9.0)
+                k4x = av
+                k4v = -math.sin(ax) + eps * math.cos(t + 4.0 * h / 5.0)
+                ax = x + h * (19372.0 * k1x / 6561.0 - 25360.0 * k2x / 2187.0
+                              + 64448.0 * k3x / 6561.0 - 212.0 * k4x / 729.0)
+                av = v + h * (19372.0 * k1v / 6561.0 - 25360.0 * k2v / 2187.0
+                              + 64448.0 * k3v / 6561.0 - 212.0 * k4v / 729.0)
+                k5x = av
+                k5v = -math.sin(ax) + eps * math.cos(t + 8.0 * h / 9.0)
+                ax = x + h * (9017.0 * k1x / 3168.0 - 355.0 * k2x / 33.0
+                              + 46732.0 * k3x / 5247.0 + 49.0 * k4x / 176.0
+                              - 5103.0 * k5x / 18656.0)
+                av = v + h * (9017.0 * k1v / 3168.0 - 355.0 * k2v / 33.0
+                              + 46732.0 * k3v / 5247.0 + 49.0 * k4v / 176.0
+                              - 5103.0 * k5v / 18656.0)
+                k6x = av
+                k6v = -math.sin(ax) + eps * math.cos(t + h)
+                x5 = x + h * (35.0 * k1x / 384.0 + 500.0 * k3x / 1113.0
+                              + 125.0 * k4x / 192.0 - 2187.0 * k5x / 6784.0
+                              + 11.0 * k6x / 84.0)
+                v5 = v + h * (35.0 * k1v / 384.0 + 500.0 * k3v / 1113.0
+                              + 125.0 * k4v / 192.0 - 2187.0 * k5v / 6784.0
+                              + 11.0 * k6v / 84.0)
+                k7x = v5
+                k7v = -math.sin(x5) + eps * math.cos(t + h)
+                err_x = h * (71.0 * k1x / 57600.0 - 71.0 * k3x / 16695.0
+                             + 71.0 * k4x / 1920.0
+                             - 17253.0 * k5x / 339200.0
+                             + 22.0 * k6x / 525.0 - k7x / 40.0)
+                err_v = h * (71.0 * k1v / 57600.0 - 71.0 * k3v / 16695.0
+                             + 71.0 * k4v / 1920.0
+                             - 17253.0 * k5v / 339200.0
+                             + 22.0 * k6v / 525.0 - k7v / 40.0)
+                scale_x = atol + rtol * max(abs(x), abs(x5))
+                scale_v = atol + rtol * max(abs(v), abs(v5))
+                err = max(abs(err_x) / scale_x, abs(err_v) / scale_v)
+                if err <= 1.0:
+                    t += h
+                    x = x5
+                    v = v5
+                factor = 0.9 * (err + 1e-16) ** -0.2
+                if factor < 0.2:
+                    factor = 0.2
+                elif factor > 5.0:
+                    factor = 5.0
+                h *= factor
+            out[m, 0] = x
+            out[m, 1] = v
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rk45_all(y0, t_eval, eps, rtol):
+        """Integrate all trajectories under prange: each one keeps its
+        own adaptive step and lands in its slice of the output."""
+        out = np.empty((y0.shape[0], t_eval.size, 2))
+        for i in prange(y0.shape[0]):
+            _rk45_trajectory(y0[i, 0], y0[i, 1], t_eval, eps, rtol,
+                             out[i])
+        return out
+
+    # Warm the dispatchers at import so the first solve does not pay
+    # the compile (the on-disk numba cache makes later processes cheap
+    # too).
+    _make_rhs(0.5)(0.0, np.zeros(2))
+    _rk45_all(np.zeros((1, 2)), np.linspace(0.0, 1.0, 3), 0.0, 1e-4)
+
+st.set_page_config(page_title="Driven Pendulum (tuned)", layout="wide")
+st.title("Driven Pendulum — tuned build")
+
+GOLDEN_RATIO = (1.0 + np.sqrt(5.0)) / 2.0
+MAX_DISPLAYED = 30
+
+QUALITY_PRESETS = {
+    "Fast": {"method": "RK45", "rtol": 1e-4, "points_per_unit": 10},
+    "Balanced": {"method": "RK45", "rtol": 1e-6, "points_per_unit": 25},
+    "High": {"method": "DOP853", "rtol": 1e-9, "points_per_unit": 50},
+    # vectorized=True only pays off for implicit methods, where the
+    # finite-difference Jacobian columns are evaluated in one RHS call;
+    # for explicit steppers the extra wrapping costs more than it saves.
+    "Stiff": {"method": "Radau", "rtol": 1e-6, "points_per_unit": 25,
+              "vectorized": True},
+}
+
+num_trajectories = st.sidebar.slider("Trajectories", 10, 5000, 50, step=10)
+epsilon = st.sidebar.slider("Drive amplitude (epsilon)", 0.0, 2.0, 0.5)
+max_time = st.sidebar.slider("Max time", 10.0, 100.0, 50.0)
+quality = st.sidebar.selectbox("Quality", list(QUALITY_PRESETS))
+
+
+def create_params_key(num_trajectories, epsilon, max_time, quality):
+    """Key of the compute-affecting parameters.
+
+    Only ever compared for equality within the session, so a plain
+    tuple does the job without string formatting or digesting.
+    """
+    return (num_trajectories, round(epsilon, 2), round(max_time, 1), quality)
+
+
+def should_recompute(params_key):
+    """True when the compute parameters changed since the last solve.
+
+    The no-change rerun path is a single tuple comparison -- no clock
+    reads, no hashing -- so it stays negligible however often the
+    script reruns.
+    """
+    if params_key == st.session_state.get("cached_params_key"):
+        return False
+    return True
+
+
+def generate_initial_conditions_optimized(num_trajectories):
+    """Golden-ratio spread of initial conditions over phase space.
+
+    Low-discrepancy placement covers the (x, v) plane more evenly than
+    a square grid for large trajectory counts.
+
+    Written as in-place passes over one (N, 2) block, so the function
+    allocates two arrays instead of a chain of N-element temporaries
+    ending in a list of tuples, and the result feeds the batched
+    integrators directly.
+    """
+    ic = np.empty((num_trajectories, 2))
+    k = np.arange(num_trajectories, dtype=np.float64)
+    np.multiply(k, 2.0 * np.pi / GOLDEN_RATIO, out=ic[:, 0])
+    ic[:, 0] %= 2.0 * np.pi
+    ic[:, 0] -= np.pi
+    np.multiply(k, 2.0 * np.pi * GOLDEN_RATIO / num_trajectories,
+                out=ic[:, 1])
+    np.sin(ic[:, 1], out=ic[:, 1])
+    ic[:, 1] *= 3.0
+    return ic
+
+
+# Dormand-Prince 5(4) tableau for the batched NumPy stepper.
+_DP_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+_DP_A = [
+    np.array([]),
+    np.array([1 / 5]),
+    np.array([3 / 40, 9 / 40]),
+    np.array([44 / 45, -56 / 15, 32 / 9]),
+    np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    np.array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176,
+              -5103 / 18656]),
+    np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]),
+]
+_DP_B = np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784,
+                  11 / 84, 0.0])
+_DP_E = _DP_B - np.array([5179 / 57600, 0.0, 7571 / 16695, 393 / 640,
+                          -92097 / 339200, 187 / 2100, 1 / 40])
+
+
+def _rhs_matrix(t, y, epsilon):
+    """RHS on the (2, N) state matrix: one SIMD sin across the batch."""
+    return np.vstack([y[1], -np.sin(y[0]) + epsilon * math.cos(t)])
+
+
+def _rk45_batch(y0, epsilon, t_eval, rtol, atol=1e-9):
+    """Adaptive Dormand-Prince 5(4) over a (2, N) state matrix.
+
+    Every stage is a whole-batch array operation, so the sin over all N
+    trajectories is one vectorized call and the SIMD width is used
+    across the batch. The step size is shared, controlled by the worst
+    scaled error in the batch, and clipped to land exactly on the
+    t_eval grid so no dense-output interpolation is needed.
+    """
+    out = np.empty((t_eval.size,) + y0.shape)
+    y = y0.astype(np.float64)
+    out[0] = y
+    t = t_eval[0]
+    h = (t_eval[1] - t_eval[0]) / 4.0
+    k = np.empty((7,) + y0.shape)
+    for m in range(1, t_eval.size):
+        t_target = t_eval[m]
+        while t < t_target:
+            h = min(h, t_target - t)
+            k[0] = _rhs_matrix(t, y, epsilon)
+            for s in range(1, 7):
+                y_stage = y + h * np.tensordot(_DP_A[s], k[:s], axes=1)
+                k[s] = _rhs_matrix(t + _DP_C[s] * h, y_stage, epsilon)
+            y_new = y + h * np.tensordot(_DP_B, k, axes=1)
+            err = h * np.tensordot(_DP_E, k, axes=1)
+            scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+            err_norm = float(np.max(np.abs(err) / scale))
+            if err_norm <= 1.0:
+                t += h
+                y = y_new
+            h *= min(5.0, max(0.2, 0.9 * (err_norm + 1e-16) ** -0.2))
+        out[m] = y
+    return out
+
+
+@st.cache_data(show_spinner="Integrating trajectories...")
+def solve_trajectories_optimized(num_trajectories, epsilon, max_time, quality):
+    """Integrate all trajectories as one batch.
+
+    The RK45 presets use the compiled parallel stepper (or the NumPy
+    batch stepper without numba); the other presets concatenate the N
+    initial conditions into one 2N state vector so the adaptive stepper
+    and its Python callback run once for the whole batch.
+
+    Returns a structure-of-arrays dict: 't' (T,), 'x' and 'v' (N, T),
+    'initial' (N, 2). Contiguous blocks pickle fast through
+    st.cache_data and feed the plotting and metrics code without any
+    per-trajectory Python iteration.
+    """
+    preset = QUALITY_PRESETS[quality]
+    initial_conditions = generate_initial_conditions_optimized(
+        num_trajectories)
+    num = len(initial_conditions)
+    positions = initial_conditions[:, 0]
+    velocities = initial_conditions[:, 1]
+    t_eval = np.linspace(0.0, max_time,
+                         int(max_time * preset["points_per_unit"]))
+
+    if preset["method"] == "RK45" and HAVE_NUMBA:
+        # Compiled per-trajectory steppers under prange: embarrassingly
+        # parallel across trajectories, each with its own adaptive step,
+        # and none of SciPy's Python-side step-acceptance logic.
+        solution = _rk45_all(initial_conditions, t_eval, epsilon,
+                             preset["rtol"])
+        xs = solution[:, :, 0]
+        vs = solution[:, :, 1]
+    elif preset["method"] == "RK45":
+        # Batch-mode stepper: each stage spans all trajectories, so the
+        # transcendentals vectorize across the batch instead of across
+        # the 7 stages of a single coupled solve_ivp system.
+        solution = _rk45_batch(np.vstack([positions, velocities]),
+                               epsilon, t_eval, preset["rtol"])
+        xs = solution[:, 0, :].T
+        vs = solution[:, 1, :].T
+    else:
+        y0 = np.concatenate([positions, velocities])
+        if HAVE_NUMBA and not preset.get("vectorized", False):
+            rhs = _make_rhs(round(epsilon, 2))
+        else:
+            def rhs(t, y):
+                # Splitting along the first axis keeps this valid for
+                # both the 1D (2N,) state and the 2D (2N, k) batches
+                # passed under vectorized=True. t is always scalar, so
+                # math.cos skips the ufunc machinery; the one remaining
+                # elementwise transcendental is the SIMD-backed np.sin.
+                half = y.shape[0] // 2
+                drive = epsilon * math.cos(t)
+                return np.concatenate([y[half:], -np.sin(y[:half]) + drive])
+
+        ivp_kwargs = {}
+        if preset["method"] in ("Radau", "BDF"):
+            # The stacked system's Jacobian is just two diagonals
+            # ([[0, I], [-diag(cos x), 0]] in the x/v block ordering),
+            # so hand it over analytically: an O(N) fill instead of
+            # O(2N) finite-difference RHS evaluations per Jacobian.
+            def jac(t, y):
+                half = y.shape[0] // 2
+                return diags([np.ones(half), -np.cos(y[:half])],
+                             [half, -half], format="csc")
+
+            ivp_kwargs["jac"] = jac
+        # No t_eval: asking solve_ivp to hit the output grid makes it
+        # run its dense-output interpolant point by point in Python.
+        # Let the stepper place its own steps, then evaluate one cubic
+        # spline over all states and output times in a single C call.
+        sol = solve_ivp(rhs, (0.0, max_time), y0,
+                        method=preset["method"], rtol=preset["rtol"],
+                        vectorized=preset.get("vectorized", False),
+                        **ivp_kwargs)
+        y_interp = CubicSpline(sol.t, sol.y, axis=1)(t_eval)
+        xs = y_interp[:num]
+        vs = y_interp[num:]
+
+    return {
+        "t": t_eval,
+        "x": np.ascontiguousarray(xs),
+        "v": np.ascontiguousarray(vs),
+        "initial": initial_conditions,
+    }
+
+
+def _lttb_indices(x, v, n_out):
+    """Largest-Triangle-Three-Buckets index selection, batched.
+
+    For each trajectory, keeps the point in every time bucket that
+    spans the largest triangle with the previously kept point and the
+    next bucket's centroid in the (x, v) plane. Unlike a strided slice
+    this preserves the peaks and envelopes of oscillatory curves at the
+    same output size. The bucket loop runs n_out times in Python, but
+    every operation inside it is vectorized across all N trajectories.
+    """
+    n, t_len = x.shape
+    if t_len <= n_out:
+        return np.broadcast_to(np.arange(t_len), (n, t_len))
+    bounds = np.linspace(1, t_len - 1, n_out - 1).astype(np.intp)
+    idx = np.empty((n, n_out), dtype=np.intp)
+    idx[:, 0] = 0
+    idx[:, -1] = t_len - 1
+    rows = np.arange(n)
+    prev = np.zeros(n, dtype=np.intp)
+    for b in range(n_out - 2):
+        lo, hi = bounds[b], max(bounds[b] + 1, bounds[b + 1])
+        if b + 2 < n_out - 1:
+            nlo, nhi = bounds[b + 1], max(bounds[b + 1] + 1, bounds[b + 2])
+        else:
+            nlo, nhi = t_len - 1, t_len
+        anchor_x = x[rows, prev][:, None]
+        anchor_v = v[rows, prev][:, None]
+        centroid_x = x[:, nlo:nhi].mean(axis=1)[:, None]
+        centroid_v = v[:, nlo:nhi].mean(axis=1)[:, None]
+        area = np.abs(
+            (anchor_x - centroid_x) * (v[:, lo:hi] - anchor_v)
+            - (anchor_x - x[:, lo:hi]) * (centroid_v - anchor_v))
+        prev = lo + np.argmax(area, axis=1)
+        idx[:, b + 1] = prev
+    return idx
+
+
+def _style_axes(ax1, ax2, shown_count):
+    ax1.set_xlabel("t")
+    ax1.set_ylabel("x")
+    ax1.set_title(f"Angle vs time (showing {shown_count} trajectories)")
+    ax2.set_xlabel("x")
+    ax2.set_ylabel("v")
+    ax2.set_title("Phase portrait")
+
+
+def create_optimized_plots(traj_data, linewidth, alpha):
+    """Render the angle time series and the phase portrait.
+
+    Reuses one persistent figure across reruns: figure and axes
+    construction is the dominant fixed cost once the solve is cached,
+    so only the artists are rebuilt.
+    """
+    if "plot_fig" not in st.session_state:
+        st.session_state["plot_fig"] = plt.subplots(1, 2, figsize=(14, 6))
+    fig, (ax1, ax2) = st.session_state["plot_fig"]
+    ax1.cla()
+    ax2.cla()
+    t = traj_data["t"]
+    x_shown = traj_data["x"][:MAX_DISPLAYED]
+    v_shown = traj_data["v"][:MAX_DISPLAYED]
+    initial = traj_data["initial"][:MAX_DISPLAYED]
+    # LTTB instead of a strided slice: uniform subsampling aliases the
+    # oscillatory phase curves; triangle-based selection keeps their
+    # envelope at the same 1000-point render cost. Indices are chosen
+    # on the phase-plane curve and reused for the time-series panel.
+    idx = _lttb_indices(x_shown, v_shown, 1000)
+    t_plot = t[idx]
+    x_plot = np.take_along_axis(x_shown, idx, axis=1)
+    v_plot = np.take_along_axis(v_shown, idx, axis=1)
+    colors = plt.cm.viridis(np.linspace(0.0, 1.0, len(x_plot)))
+    # One LineCollection per panel instead of one Line2D per
+    # trajectory: a single artist, a single Agg pass.
+    ax1.add_collection(LineCollection(
+        np.stack([t_plot, x_plot], axis=-1), colors=colors,
+        linewidths=linewidth, alpha=alpha, rasterized=True))
+    ax2.add_collection(LineCollection(
+        np.stack([x_plot, v_plot], axis=-1), colors=colors,
+        linewidths=linewidth, alpha=alpha, rasterized=True))
+    # One PathCollection with N points, not N single-point scatters.
+    ax2.scatter(initial[:, 0], initial[:, 1], c=colors, s=5,
+                alpha=min(0.8, alpha + 0.2), zorder=5)
+    ax1.autoscale_view()
+    ax2.autoscale_view()
+    _style_axes(ax1, ax2, len(x_plot))
+    fig.tight_layout()
+    return fig
+
+
+@st.cache_resource
+def _warm_start():
+    """Run one tiny end-to-end solve per worker process.
+
+    Even with the import-time kernel warmup, the first real solve still
+    pays dispatcher lookups and cache plumbing; doing a toy solve here
+    hides that behind the initial page render instead of the first
+    slider move.
+    """
+    solve_trajectories_optimized(10, 0.5, 10.0, "Fast")
+    return True
+
+
+_warm_start()
+
+params_key = create_params_key(num_trajectories, epsilon, max_time, quality)
+if should_recompute(params_key):
+    start = time.time()
+    traj_data = solve_trajectories_optimized(
+        num_trajectories, epsilon, max_time, quality)
+    st.session_state["traj_data"] = traj_data
+    st.session_state["cached_params_key"] = params_key
+    st.session_state["last_computation_time"] = time.time() - start
+    st.session_state["fresh"] = True
+else:
+    traj_data = st.session_state["traj_data"]
+    st.session_state["fresh"] = False
+
+
+@st.fragment
+def render_plot(traj_data):
+    """Plot plus its style controls, isolated in a fragment.
+
+    Moving the purely visual sliders reruns only this function -- the
+    compute path above, including its cache lookup, is not touched.
+    """
+    style_cols = st.columns(2)
+    linewidth = style_cols[0].slider("Line width", 0.1, 3.0, 0.8)
+    alpha = style_cols[1].slider("Alpha", 0.1, 1.0, 0.6)
+    fig = create_optimized_plots(traj_data, linewidth, alpha)
+    st.pyplot(fig, clear_figure=False)
+
+
+render_plot(traj_data)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Compute time",
+            f"{st.session_state.get('last_computation_time', 0.0):.2f}s")
+col2.metric("Status", "🔄 Fresh" if st.session_state["fresh"] else "📦 Cached")
+# A contiguous column slice plus one np.ptp reduction -- no Python
+# list build over the trajectories.
+col3.metric("Final spread", f"{np.ptp(traj_data['x'][:, -1]):.2f}")
+col4.metric("Points per trajectory", f"{traj_data['x'].shape[1]}")